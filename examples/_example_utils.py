@@ -0,0 +1,74 @@
+# OpenFermion plugin to interface with Psi4
+# Copyright 2017 The OpenFermion Developers.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+
+"""Helper functions shared by the data generation scripts."""
+import contextlib
+import os
+import shutil
+import tempfile
+
+
+@contextlib.contextmanager
+def private_run_directory():
+    """Work from a temporary directory for the duration of the context.
+
+    Psi4 scratch clean up removes every *.clean file in the working
+    directory, so concurrent runs must not share one.
+    """
+    working_directory = os.getcwd()
+    run_directory = tempfile.mkdtemp()
+    os.chdir(run_directory)
+    try:
+        yield run_directory
+    finally:
+        os.chdir(working_directory)
+        shutil.rmtree(run_directory, ignore_errors=True)
+
+
+def load_saved(molecule):
+    """Load previously saved results for molecule, if any exist."""
+    if os.path.exists(molecule.filename + '.hdf5'):
+        molecule.load()
+    return molecule
+
+
+def missing_methods(molecule,
+                    run_scf=True,
+                    run_mp2=False,
+                    run_cisd=False,
+                    run_ccsd=False,
+                    run_fci=False):
+    """Find requested calculations without saved results.
+
+    Args:
+        molecule: An instance of the MolecularData class.
+        run_scf: Optional boolean whether SCF is requested.
+        run_mp2: Optional boolean whether MP2 is requested.
+        run_cisd: Optional boolean whether CISD is requested.
+        run_ccsd: Optional boolean whether CCSD is requested.
+        run_fci: Optional boolean whether FCI is requested.
+
+    Returns:
+        methods: A list of names of requested methods whose energies are
+            not yet stored in molecule.
+    """
+    requested = [('scf', run_scf, molecule.hf_energy),
+                 ('mp2', run_mp2, molecule.mp2_energy),
+                 ('cisd', run_cisd, molecule.cisd_energy),
+                 ('ccsd', run_ccsd, molecule.ccsd_energy),
+                 ('fci', run_fci, molecule.fci_energy)]
+    return [method for method, run, energy in requested
+            if run and not energy]
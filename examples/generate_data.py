@@ -15,61 +15,75 @@
 # along with this program. If not, see <http://www.gnu.org/licenses/>.
 
 """This is a simple script for generating data."""
-import os
+import multiprocessing
 
 from openfermion.chem import make_atomic_ring, MolecularData
 
 from openfermionpsi4 import run_psi4
 
+from _example_utils import (load_saved, missing_methods,
+                            private_run_directory)
 
-if __name__ == '__main__':
+# Set chemical parameters.
+basis = 'sto-3g'
+max_electrons = 10
+spacing = 0.7414
+compute_elements = 0
+
+# Select calculations.
+force_recompute = 1
+run_scf = 1
+run_mp2 = 1
+run_cisd = 1
+run_ccsd = 1
+run_fci = 1
+verbose = 1
+tolerate_error = 1
+
+# Number of threads given to each Psi4 process.
+psi4_threads = 1
 
-    # Set chemical parameters.
-    basis = 'sto-3g'
-    max_electrons = 10
-    spacing = 0.7414
-    compute_elements = 0
 
-    # Select calculations.
-    force_recompute = 1
-    run_scf = 1
-    run_mp2 = 1
-    run_cisd = 1
-    run_ccsd = 1
-    run_fci = 1
-    verbose = 1
-    tolerate_error = 1
+def compute_one(n_electrons):
+    """Generate and save data for a ring of n_electrons hydrogen atoms.
 
-    # Generate data.
-    for n_electrons in range(2, max_electrons + 1):
+    Returns:
+        filename: A string giving the name of the molecule file, or None if
+            no calculation was needed.
+    """
+    # Initialize.
+    molecule = load_saved(make_atomic_ring(n_electrons, spacing, basis))
 
-        # Initialize.
-        molecule = make_atomic_ring(n_electrons, spacing, basis)
-        if os.path.exists(molecule.filename + '.hdf5'):
-            molecule.load()
+    # To run or not to run.
+    run_job = force_recompute or missing_methods(molecule,
+                                                 run_scf=run_scf,
+                                                 run_mp2=run_mp2,
+                                                 run_cisd=run_cisd,
+                                                 run_ccsd=run_ccsd,
+                                                 run_fci=run_fci)
+    if not run_job:
+        return None
 
-        # To run or not to run.
-        if run_scf and not molecule.hf_energy:
-            run_job = 1
-        elif run_mp2 and not molecule.mp2_energy:
-            run_job = 1
-        elif run_cisd and not molecule.cisd_energy:
-            run_job = 1
-        elif run_ccsd and not molecule.ccsd_energy:
-            run_job = 1
-        elif run_fci and not molecule.fci_energy:
-            run_job = 1
-        else:
-            run_job = force_recompute
+    # Run.
+    with private_run_directory():
+        molecule = run_psi4(molecule,
+                            run_scf=run_scf,
+                            run_mp2=run_mp2,
+                            run_cisd=run_cisd,
+                            run_ccsd=run_ccsd,
+                            run_fci=run_fci,
+                            verbose=verbose,
+                            tolerate_error=tolerate_error,
+                            n_threads=psi4_threads)
+    molecule.save()
+    return molecule.filename
+
+
+if __name__ == '__main__':
 
-        # Run.
-        if run_job:
-            molecule = run_psi4(molecule,
-                                run_scf=run_scf,
-                                run_mp2=run_mp2,
-                                run_cisd=run_cisd,
-                                run_ccsd=run_ccsd,
-                                run_fci=run_fci,
-                                verbose=verbose,
-                                tolerate_error=tolerate_error)
-            molecule.save()
+    # Generate data, splitting cores between Psi4 processes.
+    electron_counts = range(2, max_electrons + 1)
+    n_processes = max(1, min(multiprocessing.cpu_count() // psi4_threads,
+                             len(electron_counts)))
+    with multiprocessing.Pool(processes=n_processes) as pool:
+        pool.map(compute_one, electron_counts)
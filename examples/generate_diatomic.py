@@ -15,12 +15,59 @@
 # along with this program. If not, see <http://www.gnu.org/licenses/>.
 
 """This is a simple script for generating data."""
-import os
+import functools
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
 
 from openfermion.chem import MolecularData
 
 from openfermionpsi4 import run_psi4
 
+from _example_utils import (load_saved, missing_methods,
+                            private_run_directory)
+
+# Set run options
+run_scf = 1
+run_mp2 = 1
+run_cisd = 1
+run_ccsd = 1
+run_fci = 1
+verbose = 1
+tolerate_error = 1
+
+
+def run_molecule(spec, n_threads):
+    """Run Psi4 on one molecule and save the results.
+
+    Molecules whose requested results are already saved are skipped.
+
+    Args:
+        spec: Tuple of (geometry, basis, multiplicity, charge, description)
+            used to initialize the MolecularData instance.
+        n_threads: Int giving number of threads Psi4 may use.
+    """
+    molecule = load_saved(MolecularData(*spec))
+    if not missing_methods(molecule,
+                           run_scf=run_scf,
+                           run_mp2=run_mp2,
+                           run_cisd=run_cisd,
+                           run_ccsd=run_ccsd,
+                           run_fci=run_fci):
+        return
+
+    with private_run_directory():
+        molecule = run_psi4(molecule,
+                            run_scf=run_scf,
+                            run_mp2=run_mp2,
+                            run_cisd=run_cisd,
+                            run_ccsd=run_ccsd,
+                            run_fci=run_fci,
+                            verbose=verbose,
+                            tolerate_error=tolerate_error,
+                            n_threads=n_threads)
+    molecule.save()
+
+
 if __name__ == '__main__':
 
     # Set chemical parameters.
@@ -35,52 +82,25 @@ if __name__ == '__main__':
     # Add points for a full dissociation curve from 0.1 to 3.0 angstroms
     spacings += [0.1 * r for r in range(1, 31)]
 
-    # Set run options
-    run_scf = 1
-    run_mp2 = 1
-    run_cisd = 1
-    run_ccsd = 1
-    run_fci = 1
-    verbose = 1
-    tolerate_error = 1
-
-    # Run Diatomic Curve
+    # Diatomic Curve
+    specs = []
     for spacing in spacings:
         description = "{}".format(spacing)
         geometry = [[element_names[0], [0, 0, 0]],
                     [element_names[1], [0, 0, spacing]]]
-        molecule = MolecularData(geometry,
-                                 basis,
-                                 multiplicity,
-                                 charge,
-                                 description)
+        specs += [(geometry, basis, multiplicity, charge, description)]
 
-        molecule = run_psi4(molecule,
-                            run_scf=run_scf,
-                            run_mp2=run_mp2,
-                            run_cisd=run_cisd,
-                            run_ccsd=run_ccsd,
-                            run_fci=run_fci,
-                            verbose=verbose,
-                            tolerate_error=tolerate_error)
-        molecule.save()
-
-    # Run Li H single point
+    # Li H single point
     description = "1.45"
     geometry = [['Li', [0, 0, 0]],
                 ['H', [0, 0, 1.45]]]
-    molecule = MolecularData(geometry,
-                             basis,
-                             multiplicity,
-                             charge,
-                             description)
-
-    molecule = run_psi4(molecule,
-                        run_scf=run_scf,
-                        run_mp2=run_mp2,
-                        run_cisd=run_cisd,
-                        run_ccsd=run_ccsd,
-                        run_fci=run_fci,
-                        verbose=verbose,
-                        tolerate_error=tolerate_error)
-    molecule.save()
+    specs += [(geometry, basis, multiplicity, charge, description)]
+
+    # Run points concurrently, splitting cores between Psi4 processes.
+    n_cores = multiprocessing.cpu_count()
+    n_workers = min(len(specs), n_cores)
+    n_threads = max(1, n_cores // n_workers)
+    with ProcessPoolExecutor(max_workers=n_workers) as executor:
+        list(executor.map(functools.partial(run_molecule,
+                                            n_threads=n_threads),
+                          specs))
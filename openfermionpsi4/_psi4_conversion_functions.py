@@ -17,17 +17,86 @@
 """Helper functions for parsing data files of different types."""
 from __future__ import absolute_import
 
+import re
+
 import numpy
 
 from openfermion.ops import InteractionOperator
 
 
+# Header opening each amplitude section of the Psi4 CCSD output.
+_AMPLITUDE_HEADER = re.compile(r'Largest (TIA|Tia|TIJAB|Tijab|TIjAb) '
+                               r'Amplitudes:')
+
+
+def _spin_slices(spins):
+    """Slices selecting the spin orbitals of the given spins (0 is alpha)."""
+    return tuple(slice(spin, None, 2) for spin in spins)
+
+
+def unpack_spatial_rdm_blocked(one_rdm_a,
+                               one_rdm_b,
+                               two_rdm_aa,
+                               two_rdm_ab,
+                               two_rdm_bb):
+    r"""
+    Convert from spin compact spatial format to spin blocks of RDM.
+
+    Only the spin blocks which may be nonzero are returned, so the zero
+    blocks of the full spin-orbital RDMs are never stored. Alpha spin
+    orbitals are even and beta spin orbitals are odd, so that
+    one_rdm[spins[0]::2, spins[1]::2] == one_rdm_blocks[spins] and likewise
+    for the four indices of two_rdm.
+
+    Note: the compact 2-RDM is stored as follows where A/B are spin up/down:
+    RDM[pqrs] = <| a_{p, A}^\dagger a_{r, A}^\dagger a_{q, A} a_{s, A} |>
+      for 'AA'/'BB' spins.
+    RDM[pqrs] = <| a_{p, A}^\dagger a_{r, B}^\dagger a_{q, B} a_{s, A} |>
+      for 'AB' spins.
+
+    Args:
+        one_rdm_a: 2-index numpy array storing alpha spin
+            sector of 1-electron reduced density matrix.
+        one_rdm_b: 2-index numpy array storing beta spin
+            sector of 1-electron reduced density matrix.
+        two_rdm_aa: 4-index numpy array storing alpha-alpha spin
+            sector of 2-electron reduced density matrix.
+        two_rdm_ab: 4-index numpy array storing alpha-beta spin
+            sector of 2-electron reduced density matrix.
+        two_rdm_bb: 4-index numpy array storing beta-beta spin
+            sector of 2-electron reduced density matrix.
+
+    Returns:
+        one_rdm_blocks: dict mapping a tuple of 2 spins (0 for alpha, 1 for
+            beta) to the 2-index numpy array storing that spin block of
+            the 1-electron density matrix.
+        two_rdm_blocks: dict mapping a tuple of 4 spins to the 4-index
+            numpy array storing that spin block of the 2-electron density
+            matrix in physicist notation.
+    """
+    one_rdm_blocks = {(0, 0): one_rdm_a,
+                      (1, 1): one_rdm_b}
+
+    # Unpack 2-RDM directly into physicist notation, swapping the last two
+    # indices of each spin block, handling case of same spin.
+    two_rdm_blocks = {(0, 0, 0, 0): two_rdm_aa.transpose(0, 2, 3, 1),
+                      (1, 1, 1, 1): two_rdm_bb.transpose(0, 2, 3, 1)}
+
+    # Handle case of mixed spin.
+    two_rdm_blocks[0, 1, 1, 0] = two_rdm_ab.transpose(0, 2, 3, 1)
+    two_rdm_blocks[0, 1, 0, 1] = -two_rdm_ab.transpose(0, 2, 1, 3)
+    two_rdm_blocks[1, 0, 0, 1] = two_rdm_ab.transpose(2, 0, 1, 3)
+    two_rdm_blocks[1, 0, 1, 0] = -two_rdm_ab.transpose(2, 0, 3, 1)
+
+    return one_rdm_blocks, two_rdm_blocks
+
+
 def unpack_spatial_rdm(one_rdm_a,
                        one_rdm_b,
                        two_rdm_aa,
                        two_rdm_ab,
                        two_rdm_bb):
-    """
+    r"""
     Convert from spin compact spatial format to spin-orbital format for RDM.
 
     Note: the compact 2-RDM is stored as follows where A/B are spin up/down:
@@ -54,6 +123,9 @@ def unpack_spatial_rdm(one_rdm_a,
         two_rdm: 4-index numpy array storing 2-electron density matrix
             in full spin-orbital space.
     """
+    one_rdm_blocks, two_rdm_blocks = unpack_spatial_rdm_blocked(
+        one_rdm_a, one_rdm_b, two_rdm_aa, two_rdm_ab, two_rdm_bb)
+
     # Initialize RDMs.
     n_orbitals = one_rdm_a.shape[0]
     n_qubits = 2 * n_orbitals
@@ -61,39 +133,32 @@ def unpack_spatial_rdm(one_rdm_a,
     two_rdm = numpy.zeros((n_qubits, n_qubits,
                            n_qubits, n_qubits))
 
-    # Unpack compact representation.
-    for p in range(n_orbitals):
-        for q in range(n_orbitals):
-
-            # Populate 1-RDM.
-            one_rdm[2 * p, 2 * q] = one_rdm_a[p, q]
-            one_rdm[2 * p + 1, 2 * q + 1] = one_rdm_b[p, q]
-
-            # Continue looping to unpack 2-RDM.
-            for r in range(n_orbitals):
-                for s in range(n_orbitals):
-
-                    # Handle case of same spin.
-                    two_rdm[2 * p, 2 * q, 2 * r, 2 * s] = (
-                        two_rdm_aa[p, r, q, s])
-                    two_rdm[2 * p + 1, 2 * q + 1, 2 * r + 1, 2 * s + 1] = (
-                        two_rdm_bb[p, r, q, s])
-
-                    # Handle case of mixed spin.
-                    two_rdm[2 * p, 2 * q + 1, 2 * r, 2 * s + 1] = (
-                        two_rdm_ab[p, r, q, s])
-                    two_rdm[2 * p, 2 * q + 1, 2 * r + 1, 2 * s] = (
-                        -1. * two_rdm_ab[p, s, q, r])
-                    two_rdm[2 * p + 1, 2 * q, 2 * r + 1, 2 * s] = (
-                        two_rdm_ab[q, s, p, r])
-                    two_rdm[2 * p + 1, 2 * q, 2 * r, 2 * s + 1] = (
-                        -1. * two_rdm_ab[q, r, p, s])
-
-    # Map to physicist notation and return.
-    two_rdm = numpy.einsum('pqsr', two_rdm)
+    # Populate the nonzero spin blocks.
+    for spins, block in one_rdm_blocks.items():
+        one_rdm[_spin_slices(spins)] = block
+    for spins, block in two_rdm_blocks.items():
+        two_rdm[_spin_slices(spins)] = block
+
     return one_rdm, two_rdm
 
 
+def _amplitude_arrays(amplitudes, n_indices):
+    """Split parsed amplitudes into integer index arrays and values.
+
+    Args:
+      amplitudes(list): Tuples of n_indices orbital indices and a value
+      n_indices(int): Number of orbital indices preceding each value
+
+    Returns:
+      arrays(tuple): n_indices integer numpy arrays of orbital indices
+        followed by a float numpy array of amplitude values
+    """
+    amplitudes = numpy.array(amplitudes, dtype=float).reshape(
+        -1, n_indices + 1)
+    indices = amplitudes[:, :n_indices].astype(int)
+    return tuple(indices.T) + (amplitudes[:, n_indices], )
+
+
 def parse_psi4_ccsd_amplitudes(number_orbitals,
                                n_alpha_electrons, n_beta_electrons,
                                psi_filename):
@@ -110,166 +175,98 @@ def parse_psi4_ccsd_amplitudes(number_orbitals,
         amplitudes
 
     """
-    output_buffer = [line for line in open(psi_filename)]
-
-    T1IA_index = None
-    T1ia_index = None
-    T2IJAB_index = None
-    T2ijab_index = None
-    T2IjAb_index = None
-
-    # Find Start Indices
-    for i, line in enumerate(output_buffer):
-        if ('Largest TIA Amplitudes:' in line):
-            T1IA_index = i
-
-        elif ('Largest Tia Amplitudes:' in line):
-            T1ia_index = i
-
-        elif ('Largest TIJAB Amplitudes:' in line):
-            T2IJAB_index = i
-
-        elif ('Largest Tijab Amplitudes:' in line):
-            T2ijab_index = i
-
-        elif ('Largest TIjAb Amplitudes:' in line):
-            T2IjAb_index = i
-
     T1IA_Amps = []
     T1ia_Amps = []
 
     T2IJAB_Amps = []
     T2ijab_Amps = []
     T2IjAb_Amps = []
-    T2IjAb_dict = {}
-
-    # Read T1's
-    if (T1IA_index is not None):
-        for line in output_buffer[T1IA_index + 1:]:
-            ivals = line.split()
-            if not ivals:
-                break
-            T1IA_Amps.append([int(ivals[0]), int(ivals[1]), float(ivals[2])])
-
-    if (T1ia_index is not None):
-        for line in output_buffer[T1ia_index + 1:]:
-            ivals = line.split()
-            if not ivals:
-                break
-            T1ia_Amps.append([int(ivals[0]), int(ivals[1]), float(ivals[2])])
-
-    # Read T2's
-    if (T2IJAB_index is not None):
-        for line in output_buffer[T2IJAB_index + 1:]:
-            ivals = line.split()
-            if not ivals:
-                break
-            T2IJAB_Amps.append([int(ivals[0]), int(ivals[1]),
-                                int(ivals[2]), int(ivals[3]),
-                                float(ivals[4])])
-
-    if (T2ijab_index is not None):
-        for line in output_buffer[T2ijab_index + 1:]:
-            ivals = line.split()
-            if not ivals:
-                break
-            T2ijab_Amps.append([int(ivals[0]), int(ivals[1]),
-                                int(ivals[2]), int(ivals[3]),
-                                float(ivals[4])])
-
-    if (T2IjAb_index is not None):
-        for line in output_buffer[T2IjAb_index + 1:]:
-            ivals = line.split()
-            if not ivals:
-                break
-            T2IjAb_Amps.append([int(ivals[0]), int(ivals[1]),
-                                int(ivals[2]), int(ivals[3]),
-                                float(ivals[4])])
-
-            T2IjAb_dict[int(ivals[0]), int(ivals[1]),
-                        int(ivals[2]), int(ivals[3])] = float(ivals[4])
+
+    # Amplitude sections as (amplitude list, number of indices)
+    sections = {'TIA': (T1IA_Amps, 2),
+                'Tia': (T1ia_Amps, 2),
+                'TIJAB': (T2IJAB_Amps, 4),
+                'Tijab': (T2ijab_Amps, 4),
+                'TIjAb': (T2IjAb_Amps, 4)}
+    found_sections = set()
+
+    # Read amplitudes in a single pass, each section running from its
+    # header to the next blank line
+    current_amps = None
+    with open(psi_filename) as stream:
+        for line in stream:
+            header = _AMPLITUDE_HEADER.search(line)
+            if header:
+                # Keep only the last printout of each section
+                section = header.group(1)
+                found_sections.add(section)
+                current_amps, current_n_indices = sections[section]
+                del current_amps[:]
+            elif current_amps is not None:
+                ivals = line.split()
+                if not ivals:
+                    current_amps = None
+                elif current_n_indices == 2:
+                    current_amps.append((int(ivals[0]), int(ivals[1]),
+                                         float(ivals[2])))
+                else:
+                    current_amps.append((int(ivals[0]), int(ivals[1]),
+                                         int(ivals[2]), int(ivals[3]),
+                                         float(ivals[4])))
 
     # Determine if calculation is restricted / closed shell or otherwise
-    restricted = T1ia_index is None and T2ijab_index is None
+    restricted = ('Tia' not in found_sections and
+                  'Tijab' not in found_sections)
 
     # Store amplitudes with spin-orbital indexing, including appropriate
     # symmetry
     single_amplitudes = numpy.zeros((number_orbitals, ) * 2)
     double_amplitudes = numpy.zeros((number_orbitals, ) * 4)
 
-    # Define local helper routines for clear indexing of orbitals
-    def alpha_occupied(i):
-        return 2 * i
-
-    def alpha_unoccupied(i):
-        return 2 * (i + n_alpha_electrons)
-
-    def beta_occupied(i):
-        return 2 * i + 1
-
-    def beta_unoccupied(i):
-        return 2 * (i + n_beta_electrons) + 1
-
-    # Store singles
-    for entry in T1IA_Amps:
-        i, a, value = entry
-        single_amplitudes[alpha_unoccupied(a),
-                          alpha_occupied(i)] = value
-        if (restricted):
-            single_amplitudes[beta_unoccupied(a),
-                              beta_occupied(i)] = value
+    # Store singles; alpha orbitals are even and beta orbitals odd, with
+    # unoccupied orbitals offset by the number of electrons of their spin
+    i, a, value = _amplitude_arrays(T1IA_Amps, 2)
+    single_amplitudes[2 * (a + n_alpha_electrons), 2 * i] = value
+    if (restricted):
+        single_amplitudes[2 * (a + n_beta_electrons) + 1, 2 * i + 1] = value
 
-    for entry in T1ia_Amps:
-        i, a, value = entry
-        single_amplitudes[beta_unoccupied(a),
-                          beta_occupied(i)] = value
+    i, a, value = _amplitude_arrays(T1ia_Amps, 2)
+    single_amplitudes[2 * (a + n_beta_electrons) + 1, 2 * i + 1] = value
 
     # Store doubles, include factor of 1/2 for convention
-    for entry in T2IJAB_Amps:
-        i, j, a, b, value = entry
-        double_amplitudes[alpha_unoccupied(a),
-                          alpha_occupied(i),
-                          alpha_unoccupied(b),
-                          alpha_occupied(j)] = value / 2.
-        if (restricted):
-            double_amplitudes[beta_unoccupied(a),
-                              beta_occupied(i),
-                              beta_unoccupied(b),
-                              beta_occupied(j)] = value / 2.
-
-    for entry in T2ijab_Amps:
-        i, j, a, b, value = entry
-        double_amplitudes[beta_unoccupied(a),
-                          beta_occupied(i),
-                          beta_unoccupied(b),
-                          beta_occupied(j)] = value / 2.
-
-    for entry in T2IjAb_Amps:
-        i, j, a, b, value = entry
-        double_amplitudes[alpha_unoccupied(a),
-                          alpha_occupied(i),
-                          beta_unoccupied(b),
-                          beta_occupied(j)] = value / 2.
-
-        if (restricted):
-            double_amplitudes[beta_unoccupied(a),
-                              beta_occupied(i),
-                              alpha_unoccupied(b),
-                              alpha_occupied(j)] = value / 2.
-
-            # Add missing same--spin amplitudes in restricted / closed-shell cases:
-            # T_IJAB = T_ijab = T_IjAb - T_IjBa
-
-            same_spin_amp = T2IjAb_dict[i,j,a,b] / 2. - T2IjAb_dict[i,j,b,a] / 2.
-
-            double_amplitudes[alpha_unoccupied(a),
-                              alpha_occupied(i),
-                              alpha_unoccupied(b),
-                              alpha_occupied(j)] = same_spin_amp / 2.
-
-            double_amplitudes[beta_unoccupied(a),
-                              beta_occupied(i),
-                              beta_unoccupied(b),
-                              beta_occupied(j)] = same_spin_amp / 2.
+    i, j, a, b, value = _amplitude_arrays(T2IJAB_Amps, 4)
+    double_amplitudes[2 * (a + n_alpha_electrons), 2 * i,
+                      2 * (b + n_alpha_electrons), 2 * j] = value * 0.5
+    if (restricted):
+        double_amplitudes[2 * (a + n_beta_electrons) + 1, 2 * i + 1,
+                          2 * (b + n_beta_electrons) + 1, 2 * j + 1] = (
+                              value * 0.5)
+
+    i, j, a, b, value = _amplitude_arrays(T2ijab_Amps, 4)
+    double_amplitudes[2 * (a + n_beta_electrons) + 1, 2 * i + 1,
+                      2 * (b + n_beta_electrons) + 1, 2 * j + 1] = value * 0.5
+
+    i, j, a, b, value = _amplitude_arrays(T2IjAb_Amps, 4)
+    double_amplitudes[2 * (a + n_alpha_electrons), 2 * i,
+                      2 * (b + n_beta_electrons) + 1, 2 * j + 1] = value * 0.5
+
+    if (restricted):
+        double_amplitudes[2 * (a + n_beta_electrons) + 1, 2 * i + 1,
+                          2 * (b + n_alpha_electrons), 2 * j] = value * 0.5
+
+        # Add missing same--spin amplitudes in restricted / closed-shell cases:
+        # T_IJAB = T_ijab = T_IjAb - T_IjBa
+        T2IjAb = numpy.zeros((number_orbitals // 2, ) * 4)
+        T2IjAb[i, j, a, b] = value
+
+        same_spin_amp = T2IjAb[i, j, a, b] * 0.5 - T2IjAb[i, j, b, a] * 0.5
+
+        double_amplitudes[2 * (a + n_alpha_electrons), 2 * i,
+                          2 * (b + n_alpha_electrons), 2 * j] = (
+                              same_spin_amp * 0.5)
+
+        double_amplitudes[2 * (a + n_beta_electrons) + 1, 2 * i + 1,
+                          2 * (b + n_beta_electrons) + 1, 2 * j + 1] = (
+                              same_spin_amp * 0.5)
 
     return single_amplitudes, double_amplitudes
@@ -17,6 +17,7 @@
 """Functions to prepare psi4 input and run calculations."""
 from __future__ import absolute_import
 
+import glob
 import os
 import re
 import subprocess
@@ -36,18 +37,11 @@ def create_geometry_string(geometry):
             H 0. 0. 0.
             H 0. 0. 0.7414
     """
-    geo_string = ''
-    for item in geometry:
-        atom = item[0]
-        coordinates = item[1]
-        line = '{} {} {} {}'.format(atom,
-                                    coordinates[0],
-                                    coordinates[1],
-                                    coordinates[2])
-        if len(geo_string) > 0:
-            geo_string += '\n'
-        geo_string += line
-    return geo_string
+    return '\n'.join('{} {} {} {}'.format(atom,
+                                          coordinates[0],
+                                          coordinates[1],
+                                          coordinates[2])
+                      for atom, coordinates in geometry)
 
 
 def generate_psi4_input(molecule,
@@ -86,75 +80,94 @@ def generate_psi4_input(molecule,
     # Parse input template.
     if template_file is None:
         template_file = psi4_directory + '/_psi4_template'
-    input_template = []
     with open(template_file, 'r') as stream:
-        for line in stream:
-            input_template += [line]
-
-    # Populate contents of input file based on automatic parameters.
-    input_content = [re.sub('&THIS_DIRECTORY',
-                            psi4_directory, line)
-                     for line in input_template]
-
-    # Populate contents of input file based on MolecularData parameters.
-    input_content = [re.sub('&geometry', str(molecule.geometry), line)
-                     for line in input_content]
-    input_content = [re.sub('&basis', molecule.basis, line)
-                     for line in input_content]
-    input_content = [re.sub('&charge', str(molecule.charge), line)
-                     for line in input_content]
-    input_content = [re.sub('&multiplicity', str(molecule.multiplicity), line)
-                     for line in input_content]
-    input_content = [re.sub('&description', str(molecule.description), line)
-                     for line in input_content]
-    input_content = [re.sub('&mol_filename', str(molecule.filename), line)
-                     for line in input_content]
-    input_content = [re.sub('&geo_string', geo_string, line)
-                     for line in input_content]
-
-    # Populate contents of input file based on provided calculation parameters.
-    input_content = [re.sub('&run_scf', str(run_scf), line)
-                     for line in input_content]
-    input_content = [re.sub('&run_mp2', str(run_mp2), line)
-                     for line in input_content]
-    input_content = [re.sub('&run_cisd', str(run_cisd), line)
-                     for line in input_content]
-    input_content = [re.sub('&run_ccsd', str(run_ccsd), line)
-                     for line in input_content]
-    input_content = [re.sub('&run_fci', str(run_fci), line)
-                     for line in input_content]
-    input_content = [re.sub('&tolerate_error', str(tolerate_error), line)
-                     for line in input_content]
-    input_content = [re.sub('&not_tolerate_error',
-                            str(not tolerate_error), line)
-                     for line in input_content]
-    input_content = [re.sub('&verbose', str(verbose), line)
-                     for line in input_content]
-    input_content = [re.sub('&memory', str(memory), line)
-                     for line in input_content]
+        input_template = stream.read()
+
+    # Populate contents of input file based on automatic parameters,
+    # MolecularData parameters and provided calculation parameters.
+    substitutions = {
+        '&THIS_DIRECTORY': psi4_directory,
+        '&geometry': str(molecule.geometry),
+        '&basis': molecule.basis,
+        '&charge': str(molecule.charge),
+        '&multiplicity': str(molecule.multiplicity),
+        '&description': str(molecule.description),
+        '&mol_filename': str(molecule.filename),
+        '&geo_string': geo_string,
+        '&run_scf': str(run_scf),
+        '&run_mp2': str(run_mp2),
+        '&run_cisd': str(run_cisd),
+        '&run_ccsd': str(run_ccsd),
+        '&run_fci': str(run_fci),
+        '&tolerate_error': str(tolerate_error),
+        '&not_tolerate_error': str(not tolerate_error),
+        '&verbose': str(verbose),
+        '&memory': str(memory)}
+
+    # Substitute all placeholders in one pass, matching longest first so
+    # that overlapping names stay unambiguous; re caches the compiled
+    # pattern across calls.
+    pattern = re.compile('|'.join(
+        re.escape(key)
+        for key in sorted(substitutions, key=len, reverse=True)))
+    input_content = pattern.sub(
+        lambda match: substitutions[match.group(0)], input_template)
 
     # Write input file and return handle.
     input_file = molecule.filename + '.inp'
     with open(input_file, 'w') as stream:
-        stream.write(''.join(input_content))
+        stream.write(input_content)
     return input_file
 
 
 def clean_up(molecule, delete_input=True, delete_output=False):
     input_file = molecule.filename + '.inp'
     output_file = molecule.filename + '.out'
-    run_directory = os.getcwd()
-    for local_file in os.listdir(run_directory):
-        if local_file.endswith('.clean'):
-            os.remove(run_directory + '/' + local_file)
-    try:
-        os.remove('timer.dat')
-    except:
-        pass
+    local_files = glob.glob('*.clean')
+    local_files += ['timer.dat']
     if delete_input:
-        os.remove(input_file)
+        local_files += [input_file]
     if delete_output:
-        os.remove(output_file)
+        local_files += [output_file]
+    for local_file in local_files:
+        try:
+            os.remove(local_file)
+        except FileNotFoundError:
+            pass
+
+
+def run_psi4_in_process(input_file, output_file, n_threads=None):
+    """This function runs a psi4 input file inside the current interpreter.
+
+    The input file is translated from psithon to python by psi4 itself,
+    exactly as the psi4 executable would, but without forking a new
+    interpreter and importing psi4 for every calculation.
+
+    Args:
+        input_file: A string giving the name of the psi4 input file.
+        output_file: A string giving the name of the psi4 output file.
+        n_threads: Optional int giving number of threads psi4 may use.
+
+    Raises:
+        ImportError: If the psi4 python module is not available.
+        psi4 errors: An error from psi4.
+    """
+    import psi4
+
+    with open(input_file, 'r') as stream:
+        input_content = stream.read()
+
+    psi4.core.set_output_file(output_file, False)
+    if n_threads is not None:
+        psi4.set_num_threads(n_threads)
+    try:
+        exec(psi4.process_input(input_content), {'__name__': '__main__'})
+    finally:
+        # Reset psi4 state so the next molecule starts clean.
+        psi4.core.clean()
+        psi4.core.clean_options()
+        psi4.core.clean_variables()
+        psi4.core.close_outfile()
 
 
 def run_psi4(molecule,
@@ -168,7 +181,10 @@ def run_psi4(molecule,
              delete_input=True,
              delete_output=False,
              memory=8000,
-             template_file=None):
+             template_file=None,
+             n_threads=None,
+             in_process=False,
+             timeout=None):
     """This function runs a Psi4 calculation.
 
     Args:
@@ -184,13 +200,32 @@ def run_psi4(molecule,
         delete_output: Optional boolean to delete psi4 output file.
         memory: Optional int giving amount of memory to allocate in MB.
         template_file(str): Path to Psi4 template file
+        n_threads: Optional int giving number of threads Psi4 may use,
+            also applied to OpenMP through OMP_NUM_THREADS. Defaults to the
+            Psi4 default.
+        in_process: Optional boolean to run Psi4 through its python module
+            in the current interpreter rather than in a new psi4 process.
+            This saves the cost of starting psi4 for each calculation but
+            gives up the memory isolation of a separate process.
+        timeout: Optional number of seconds after which a psi4 process is
+            killed and the calculation treated as failed. Defaults to no
+            limit. Not applied when in_process is True.
 
     Returns:
         molecule: The updated MolecularData object.
 
     Raises:
         psi4 errors: An error from psi4.
+        subprocess.CalledProcessError: If psi4 exits with an error.
+        subprocess.TimeoutExpired: If psi4 runs longer than timeout.
+        ImportError: If in_process is True and the psi4 python module is
+            not available, regardless of tolerate_error.
     """
+    # A missing psi4 module is a configuration error, not a failed
+    # calculation, so check for it before errors can be tolerated.
+    if in_process:
+        import psi4
+
     # Prepare input.
     input_file = generate_psi4_input(molecule,
                                      run_scf,
@@ -205,16 +240,32 @@ def run_psi4(molecule,
 
     # Run psi4.
     output_file = molecule.filename + '.out'
+    command = ['psi4']
+    env = None
+    if n_threads is not None:
+        command += ['-n', str(n_threads)]
+        env = dict(os.environ, OMP_NUM_THREADS=str(n_threads))
+    command += [input_file, output_file]
     try:
-        process = subprocess.Popen(['psi4', input_file, output_file])
-        process.wait()
-    except:
+        if in_process:
+            run_psi4_in_process(input_file, output_file, n_threads)
+        else:
+            process = subprocess.Popen(command, env=env)
+            try:
+                process.wait(timeout=timeout)
+            except BaseException:
+                # Do not leave psi4 running on timeout or interruption.
+                process.kill()
+                process.wait()
+                raise
+            if process.returncode != 0:
+                raise subprocess.CalledProcessError(process.returncode,
+                                                    command)
+    except Exception:
         print('Psi4 calculation for {} has failed.'.format(molecule.name))
-        process.kill()
-        clean_up(molecule, delete_input, delete_output)
         if not tolerate_error:
             raise
-    else:
+    finally:
         clean_up(molecule, delete_input, delete_output)
 
     # Return updated molecule instance.
@@ -0,0 +1,108 @@
+# OpenFermion plugin to interface with Psi4.
+# Copyright 2017 The OpenFermion Developers.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+
+"""Tests for running psi4 in the current interpreter."""
+import os
+import shutil
+import sys
+import tempfile
+import types
+import unittest
+
+from openfermionpsi4._run_psi4 import run_psi4, run_psi4_in_process
+
+
+class _StubMolecule(object):
+
+    def __init__(self, filename):
+        self.geometry = [('H', (0., 0., 0.)), ('H', (0., 0., 0.7414))]
+        self.basis = 'sto-3g'
+        self.charge = 0
+        self.multiplicity = 1
+        self.description = None
+        self.filename = filename
+        self.name = 'H2'
+
+    def load(self):
+        pass
+
+
+class RunPsi4InProcessTest(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.input_file = os.path.join(self.directory, 'stub.inp')
+        self.output_file = os.path.join(self.directory, 'stub.out')
+        with open(self.input_file, 'w') as stream:
+            stream.write('psithon input')
+
+        # Stub psi4 module recording the calls made to it.
+        self.calls = []
+        self.translated = 'import psi4\npsi4.executed = True\n'
+        psi4 = types.ModuleType('psi4')
+        psi4.core = types.ModuleType('psi4.core')
+        psi4.executed = False
+
+        def record(name):
+            return lambda *args: self.calls.append((name, ) + args)
+        for name in ('set_output_file', 'clean', 'clean_options',
+                     'clean_variables', 'close_outfile'):
+            setattr(psi4.core, name, record(name))
+        psi4.set_num_threads = record('set_num_threads')
+        psi4.process_input = lambda content: (
+            self.calls.append(('process_input', content)) or self.translated)
+
+        self.psi4 = psi4
+        self.saved_psi4 = sys.modules.get('psi4')
+        sys.modules['psi4'] = psi4
+
+    def tearDown(self):
+        if self.saved_psi4 is None:
+            del sys.modules['psi4']
+        else:
+            sys.modules['psi4'] = self.saved_psi4
+        shutil.rmtree(self.directory)
+
+    def assert_reset(self):
+        self.assertEqual([call[0] for call in self.calls[-4:]],
+                         ['clean', 'clean_options', 'clean_variables',
+                          'close_outfile'])
+
+    def test_executes_translated_input(self):
+        run_psi4_in_process(self.input_file, self.output_file, n_threads=2)
+        self.assertTrue(self.psi4.executed)
+        self.assertIn(('set_output_file', self.output_file, False),
+                      self.calls)
+        self.assertIn(('set_num_threads', 2), self.calls)
+        self.assertIn(('process_input', 'psithon input'), self.calls)
+        self.assert_reset()
+
+    def test_resets_state_when_run_raises(self):
+        self.translated = 'raise RuntimeError("psi4 failed")\n'
+        with self.assertRaises(RuntimeError):
+            run_psi4_in_process(self.input_file, self.output_file)
+        self.assert_reset()
+
+    def test_missing_psi4_is_not_tolerated(self):
+        sys.modules['psi4'] = None
+        molecule = _StubMolecule(os.path.join(self.directory, 'H2'))
+        with self.assertRaises(ImportError):
+            run_psi4(molecule, in_process=True, tolerate_error=True)
+        self.assertFalse(os.path.exists(molecule.filename + '.inp'))
+
+
+if __name__ == '__main__':
+    unittest.main()